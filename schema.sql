@@ -3,6 +3,9 @@
 -- Enable UUID extension
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
+-- Enable btree_gist so scalar columns can share GiST indexes with ranges
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
 -- Create custom types
 CREATE TYPE status_type AS ENUM ('completed', 'pending', 'in-progress', 'cancelled');
 CREATE TYPE shipment_type AS ENUM ('incoming', 'outgoing');
@@ -67,6 +70,13 @@ CREATE TABLE shipments (
     tracking_number VARCHAR(255),
     serial_start VARCHAR(50),
     serial_end VARCHAR(50),
+    -- Serials are "<prefix><digits>"; the numeric parts form a searchable range
+    serial_prefix VARCHAR(50) GENERATED ALWAYS AS (regexp_replace(serial_start, '[0-9]+$', '')) STORED,
+    serial_range INT8RANGE GENERATED ALWAYS AS (
+        CASE WHEN serial_start ~ '[0-9]+$' AND serial_end ~ '[0-9]+$'
+        THEN int8range(substring(serial_start from '([0-9]+)$')::BIGINT, substring(serial_end from '([0-9]+)$')::BIGINT, '[]')
+        END
+    ) STORED,
     total_units INTEGER DEFAULT 0,
     weight_kg DECIMAL(8,2),
     estimated_arrival TIMESTAMP WITH TIME ZONE,
@@ -74,7 +84,12 @@ CREATE TABLE shipments (
     status status_type DEFAULT 'pending',
     notes TEXT,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    -- A unit can only be received once and shipped out once
+    CONSTRAINT shipments_incoming_serial_overlap EXCLUDE USING gist (serial_prefix WITH =, serial_range WITH &&)
+        WHERE (type = 'incoming' AND status <> 'cancelled'),
+    CONSTRAINT shipments_outgoing_serial_overlap EXCLUDE USING gist (serial_prefix WITH =, serial_range WITH &&)
+        WHERE (type = 'outgoing' AND status <> 'cancelled')
 );
 
 -- Components/Parts table
@@ -134,17 +149,33 @@ CREATE TABLE budget_entries (
 -- Create indexes for better performance
 CREATE INDEX idx_returns_status ON returns(status);
 CREATE INDEX idx_returns_return_date ON returns(return_date);
+CREATE INDEX idx_returns_company_id ON returns(company_id);
 CREATE INDEX idx_repairs_status ON repairs(status);
 CREATE INDEX idx_repairs_priority ON repairs(priority);
 CREATE INDEX idx_repairs_start_date ON repairs(start_date);
+-- Open-repair work queues: critical first, then soonest due
+CREATE INDEX idx_repairs_technician_queue ON repairs(assigned_technician, priority DESC NULLS LAST, estimated_completion)
+    WHERE status IN ('pending', 'in-progress');
+CREATE INDEX idx_repairs_open_queue ON repairs(priority DESC NULLS LAST, estimated_completion)
+    WHERE status IN ('pending', 'in-progress');
 CREATE INDEX idx_shipments_type ON shipments(type);
 CREATE INDEX idx_shipments_status ON shipments(status);
 CREATE INDEX idx_shipments_estimated_arrival ON shipments(estimated_arrival);
+CREATE INDEX idx_shipments_serial_range ON shipments USING gist (serial_prefix, serial_range);
 CREATE INDEX idx_components_sku ON components(sku);
 CREATE INDEX idx_components_current_stock ON components(current_stock);
+CREATE INDEX idx_components_category ON components(category);
+-- Low-stock alerts only ever touch the handful of rows at or below their reorder level
+CREATE INDEX idx_components_low_stock ON components(category) WHERE current_stock <= reorder_level;
+CREATE INDEX idx_repair_components_repair_id ON repair_components(repair_id);
+CREATE INDEX idx_repair_components_component_id ON repair_components(component_id);
 CREATE INDEX idx_stock_movements_component_id ON stock_movements(component_id);
 CREATE INDEX idx_stock_movements_created_at ON stock_movements(created_at);
+CREATE INDEX idx_stock_movements_reference ON stock_movements(reference_id, component_id) WHERE reference_id IS NOT NULL;
+-- Stockout forecast: consumption is read index-only in component order, so the per-day totals need no large sort
+CREATE INDEX idx_stock_movements_out_component ON stock_movements(component_id, created_at) INCLUDE (quantity) WHERE movement_type = 'out';
 CREATE INDEX idx_budget_entries_week_start ON budget_entries(week_start);
+CREATE INDEX idx_budget_entries_category ON budget_entries(category);
 
 -- Create triggers for updated_at timestamps
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -163,9 +194,14 @@ CREATE TRIGGER update_components_updated_at BEFORE UPDATE ON components FOR EACH
 CREATE TRIGGER update_budget_entries_updated_at BEFORE UPDATE ON budget_entries FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
 -- Function to update component stock
+-- Batched writers set pentwheel.defer_stock_update for their transaction and
+-- apply one netted update per component instead of one per movement.
 CREATE OR REPLACE FUNCTION update_component_stock()
 RETURNS TRIGGER AS $$
 BEGIN
+    IF current_setting('pentwheel.defer_stock_update', true) = 'on' THEN
+        RETURN NEW;
+    END IF;
     IF NEW.movement_type = 'in' THEN
         UPDATE components SET current_stock = current_stock + NEW.quantity WHERE id = NEW.component_id;
     ELSIF NEW.movement_type = 'out' THEN
@@ -181,6 +217,138 @@ CREATE TRIGGER trigger_update_component_stock
     AFTER INSERT ON stock_movements 
     FOR EACH ROW EXECUTE FUNCTION update_component_stock();
 
+-- Change log for delta synchronization (inserts, updates and delete tombstones)
+-- Readers only see entries from transactions older than every in-flight one,
+-- so a (txid, seq) position never skips a change that commits late.
+CREATE TABLE change_log (
+    seq BIGSERIAL PRIMARY KEY,
+    txid BIGINT NOT NULL DEFAULT pg_current_xact_id()::TEXT::BIGINT,
+    table_name VARCHAR(63) NOT NULL,
+    row_id UUID NOT NULL,
+    operation VARCHAR(10) NOT NULL CHECK (operation IN ('insert', 'update', 'delete')),
+    data JSONB, -- Row after the change; NULL for deletes
+    changed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX idx_change_log_position ON change_log(txid, seq);
+
+CREATE OR REPLACE FUNCTION record_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO change_log (table_name, row_id, operation) VALUES (TG_TABLE_NAME, OLD.id, 'delete');
+        RETURN OLD;
+    END IF;
+    INSERT INTO change_log (table_name, row_id, operation, data) VALUES (TG_TABLE_NAME, NEW.id, lower(TG_OP), to_jsonb(NEW));
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER record_companies_changes AFTER INSERT OR UPDATE OR DELETE ON companies FOR EACH ROW EXECUTE FUNCTION record_change();
+CREATE TRIGGER record_returns_changes AFTER INSERT OR UPDATE OR DELETE ON returns FOR EACH ROW EXECUTE FUNCTION record_change();
+CREATE TRIGGER record_repairs_changes AFTER INSERT OR UPDATE OR DELETE ON repairs FOR EACH ROW EXECUTE FUNCTION record_change();
+CREATE TRIGGER record_shipments_changes AFTER INSERT OR UPDATE OR DELETE ON shipments FOR EACH ROW EXECUTE FUNCTION record_change();
+CREATE TRIGGER record_components_changes AFTER INSERT OR UPDATE OR DELETE ON components FOR EACH ROW EXECUTE FUNCTION record_change();
+CREATE TRIGGER record_repair_components_changes AFTER INSERT OR UPDATE OR DELETE ON repair_components FOR EACH ROW EXECUTE FUNCTION record_change();
+CREATE TRIGGER record_stock_movements_changes AFTER INSERT OR UPDATE OR DELETE ON stock_movements FOR EACH ROW EXECUTE FUNCTION record_change();
+CREATE TRIGGER record_budget_entries_changes AFTER INSERT OR UPDATE OR DELETE ON budget_entries FOR EACH ROW EXECUTE FUNCTION record_change();
+
+-- Exact row counts per value of the common list filters.
+-- Triggers only append +1/-1 rows to row_count_deltas, so concurrent writers never
+-- wait on a shared counter row; compact_row_counts() periodically folds the deltas
+-- into row_counts. A count is the compacted value plus its pending deltas.
+-- The trigger arguments name the columns to count.
+CREATE TABLE row_counts (
+    table_name VARCHAR(63) NOT NULL,
+    column_name VARCHAR(63) NOT NULL,
+    value VARCHAR(100) NOT NULL,
+    row_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (table_name, column_name, value)
+);
+
+CREATE TABLE row_count_deltas (
+    id BIGSERIAL PRIMARY KEY,
+    table_name VARCHAR(63) NOT NULL,
+    column_name VARCHAR(63) NOT NULL,
+    value VARCHAR(100) NOT NULL,
+    delta INTEGER NOT NULL
+);
+
+CREATE INDEX idx_row_count_deltas_key ON row_count_deltas(table_name, column_name, value);
+
+CREATE OR REPLACE FUNCTION maintain_row_counts()
+RETURNS TRIGGER AS $$
+DECLARE
+    counted_column TEXT;
+    old_value TEXT;
+    new_value TEXT;
+BEGIN
+    FOREACH counted_column IN ARRAY TG_ARGV LOOP
+        old_value := CASE WHEN TG_OP IN ('UPDATE', 'DELETE') THEN to_jsonb(OLD) ->> counted_column END;
+        new_value := CASE WHEN TG_OP IN ('INSERT', 'UPDATE') THEN to_jsonb(NEW) ->> counted_column END;
+        CONTINUE WHEN old_value IS NOT DISTINCT FROM new_value;
+        IF old_value IS NOT NULL THEN
+            INSERT INTO row_count_deltas (table_name, column_name, value, delta)
+            VALUES (TG_TABLE_NAME, counted_column, old_value, -1);
+        END IF;
+        IF new_value IS NOT NULL THEN
+            INSERT INTO row_count_deltas (table_name, column_name, value, delta)
+            VALUES (TG_TABLE_NAME, counted_column, new_value, 1);
+        END IF;
+    END LOOP;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+-- Fold pending deltas into row_counts. Concurrent calls are safe: each delta row
+-- is deleted, and therefore applied, by exactly one of them.
+CREATE OR REPLACE FUNCTION compact_row_counts()
+RETURNS BIGINT AS $$
+DECLARE
+    folded BIGINT;
+BEGIN
+    WITH moved AS (
+        DELETE FROM row_count_deltas RETURNING table_name, column_name, value, delta
+    ), folded_totals AS (
+        INSERT INTO row_counts (table_name, column_name, value, row_count)
+        SELECT table_name, column_name, value, SUM(delta)
+        FROM moved
+        GROUP BY table_name, column_name, value
+        ORDER BY table_name, column_name, value
+        ON CONFLICT (table_name, column_name, value) DO UPDATE SET row_count = row_counts.row_count + EXCLUDED.row_count
+    )
+    SELECT count(*) INTO folded FROM moved;
+    RETURN folded;
+END;
+$$ language 'plpgsql';
+
+-- Create the triggers and backfill in one transaction, with writers locked out,
+-- so rows that already exist are counted exactly once
+BEGIN;
+LOCK TABLE returns, repairs, shipments, stock_movements IN SHARE MODE;
+
+CREATE TRIGGER count_returns_rows AFTER INSERT OR UPDATE OR DELETE ON returns FOR EACH ROW EXECUTE FUNCTION maintain_row_counts('status');
+CREATE TRIGGER count_repairs_rows AFTER INSERT OR UPDATE OR DELETE ON repairs FOR EACH ROW EXECUTE FUNCTION maintain_row_counts('status', 'priority');
+CREATE TRIGGER count_shipments_rows AFTER INSERT OR UPDATE OR DELETE ON shipments FOR EACH ROW EXECUTE FUNCTION maintain_row_counts('type', 'status');
+CREATE TRIGGER count_stock_movements_rows AFTER INSERT OR UPDATE OR DELETE ON stock_movements FOR EACH ROW EXECUTE FUNCTION maintain_row_counts('movement_type');
+
+INSERT INTO row_counts (table_name, column_name, value, row_count)
+SELECT 'returns', 'status', status::text, count(*) FROM returns WHERE status IS NOT NULL GROUP BY status
+UNION ALL
+SELECT 'repairs', 'status', status::text, count(*) FROM repairs WHERE status IS NOT NULL GROUP BY status
+UNION ALL
+SELECT 'repairs', 'priority', priority::text, count(*) FROM repairs WHERE priority IS NOT NULL GROUP BY priority
+UNION ALL
+SELECT 'shipments', 'type', type::text, count(*) FROM shipments WHERE type IS NOT NULL GROUP BY type
+UNION ALL
+SELECT 'shipments', 'status', status::text, count(*) FROM shipments WHERE status IS NOT NULL GROUP BY status
+UNION ALL
+SELECT 'stock_movements', 'movement_type', movement_type::text, count(*) FROM stock_movements WHERE movement_type IS NOT NULL GROUP BY movement_type
+ON CONFLICT (table_name, column_name, value) DO UPDATE SET row_count = EXCLUDED.row_count;
+DELETE FROM row_count_deltas;
+
+COMMIT;
+
 -- Insert sample data
 INSERT INTO companies (name, email, phone, contact_person) VALUES
 ('TechCorp Inc.', 'orders@techcorp.com', '+1-555-0101', 'John Smith'),
@@ -210,6 +378,9 @@ ALTER TABLE components ENABLE ROW LEVEL SECURITY;
 ALTER TABLE repair_components ENABLE ROW LEVEL SECURITY;
 ALTER TABLE stock_movements ENABLE ROW LEVEL SECURITY;
 ALTER TABLE budget_entries ENABLE ROW LEVEL SECURITY;
+ALTER TABLE change_log ENABLE ROW LEVEL SECURITY;
+ALTER TABLE row_counts ENABLE ROW LEVEL SECURITY;
+ALTER TABLE row_count_deltas ENABLE ROW LEVEL SECURITY;
 
 -- For now, allow all authenticated users to access all data
 CREATE POLICY "Allow all operations for authenticated users" ON companies FOR ALL USING (auth.role() = 'authenticated');
@@ -220,3 +391,6 @@ CREATE POLICY "Allow all operations for authenticated users" ON components FOR A
 CREATE POLICY "Allow all operations for authenticated users" ON repair_components FOR ALL USING (auth.role() = 'authenticated');
 CREATE POLICY "Allow all operations for authenticated users" ON stock_movements FOR ALL USING (auth.role() = 'authenticated');
 CREATE POLICY "Allow all operations for authenticated users" ON budget_entries FOR ALL USING (auth.role() = 'authenticated');
+CREATE POLICY "Allow all operations for authenticated users" ON change_log FOR ALL USING (auth.role() = 'authenticated');
+CREATE POLICY "Allow all operations for authenticated users" ON row_counts FOR ALL USING (auth.role() = 'authenticated');
+CREATE POLICY "Allow all operations for authenticated users" ON row_count_deltas FOR ALL USING (auth.role() = 'authenticated');
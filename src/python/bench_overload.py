@@ -0,0 +1,105 @@
+# Pentwheel overload test
+# Floods list and analytics routes at a multiple of the admission budgets while
+# sampling latency on the critical routes (/health and by-id lookups).
+#
+# Usage: python bench_overload.py --url http://localhost:8000 [--overload 3] [--duration 30]
+# Run once with the default budgets, then restart the server with them raised
+# (e.g. ADMISSION_READS=1000,0,60 ADMISSION_ANALYTICS=1000,0,60) and repeat with
+# --clients set to the first run's flood size to compare p99 without load shedding.
+
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+def request(url: str):
+    """Return (status, latency in ms) for a GET"""
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=30) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as exc:
+        status = exc.code
+    except OSError:
+        status = 0
+    return status, (time.perf_counter() - start) * 1000
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def flood(urls, stop, statuses, lock):
+    i = 0
+    while not stop.is_set():
+        status, _ = request(urls[i % len(urls)])
+        with lock:
+            statuses[status] += 1
+        i += 1
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure critical-route latency under overload")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--overload", type=float, default=3.0, help="Flood clients as a multiple of the budget capacity")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--clients", type=int, help="Flood clients; defaults to --overload times the budget capacity")
+    args = parser.parse_args()
+
+    base = args.url.rstrip("/")
+    with urllib.request.urlopen(f"{base}/components/?limit=1") as response:
+        components = json.loads(response.read())
+    # Size the flood from the server's own budgets, not this process's environment
+    with urllib.request.urlopen(f"{base}/health/admission") as response:
+        budgets = json.loads(response.read())
+    critical = [f"{base}/health"]
+    if components:
+        critical.append(f"{base}/components/{components[0]['id']}")
+
+    flood_urls = [
+        f"{base}/stock-movements/?limit=1000",
+        f"{base}/repairs/?limit=1000",
+        f"{base}/analytics/repairs/status-summary",
+        f"{base}/analytics/components/stockout-forecast",
+    ]
+    capacity = sum(
+        budget["limit"] + budget["max_queue"]
+        for name, budget in budgets.items()
+        if name in ("reads", "analytics")
+    )
+    flooders = args.clients or max(1, int(capacity * args.overload))
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    flood_statuses = Counter()
+    critical_statuses = Counter()
+    latencies = {url: [] for url in critical}
+
+    with ThreadPoolExecutor(max_workers=flooders) as pool:
+        for _ in range(flooders):
+            pool.submit(flood, flood_urls, stop, flood_statuses, lock)
+        deadline = time.monotonic() + args.duration
+        while time.monotonic() < deadline:
+            for url in critical:
+                status, latency = request(url)
+                critical_statuses[status] += 1
+                if status == 200:
+                    latencies[url].append(latency)
+            time.sleep(0.05)
+        stop.set()
+
+    print(f"{flooders} flood clients for {args.duration:.0f}s (budget capacity {capacity})")
+    print(f"flood responses:    {dict(flood_statuses)}")
+    print(f"critical responses: {dict(critical_statuses)}")
+    for url, values in latencies.items():
+        print(f"{url:60} n={len(values):5} p50={percentile(values, 50):8.1f}ms p99={percentile(values, 99):8.1f}ms")
+    with urllib.request.urlopen(f"{base}/health/admission") as response:
+        print(json.dumps(json.loads(response.read()), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# Pentwheel read-path benchmark
+# Compares ORM reads against the Core read path used by the detail and list endpoints.
+#
+# Usage: python bench_reads.py [--iterations 2000] [--limit 100]
+# Runs against the database configured in fast.py; it only issues SELECTs.
+
+import argparse
+import statistics
+import time
+import tracemalloc
+
+from fastapi import Response
+
+import fast
+from fast import SessionLocal, Company, Return, Repair, Shipment, Component, RepairComponent, StockMovement, BudgetEntry
+
+def first_id(db, model):
+    row = db.query(model.id).first()
+    return row.id if row else None
+
+def build_cases(db, limit):
+    """(name, ORM read, Core read) per endpoint"""
+    cases = []
+    list_endpoints = [
+        ("GET /companies/", Company, fast.get_companies, {}),
+        ("GET /returns/", Return, fast.get_returns, {"status": None}),
+        ("GET /repairs/", Repair, fast.get_repairs, {"status": None, "priority": None}),
+        ("GET /shipments/", Shipment, fast.get_shipments, {"type": None, "status": None}),
+        ("GET /components/", Component, fast.get_components, {"category": None, "low_stock": False}),
+        ("GET /repair-components/", RepairComponent, fast.get_repair_components, {"repair_id": None}),
+        ("GET /stock-movements/", StockMovement, fast.get_stock_movements, {"component_id": None, "movement_type": None}),
+        ("GET /budget-entries/", BudgetEntry, fast.get_budget_entries, {"category": None, "week_start": None}),
+    ]
+    for name, model, handler, filters in list_endpoints:
+        cases.append((
+            name,
+            lambda model=model: db.query(model).offset(0).limit(limit).all(),
+            lambda handler=handler, filters=filters: handler(response=Response(), skip=0, limit=limit, db=db, **filters)
+        ))
+
+    detail_endpoints = [
+        ("GET /companies/{id}", Company, fast.get_company),
+        ("GET /returns/{id}", Return, fast.get_return),
+        ("GET /repairs/{id}", Repair, fast.get_repair),
+        ("GET /shipments/{id}", Shipment, fast.get_shipment),
+        ("GET /components/{id}", Component, fast.get_component),
+        ("GET /repair-components/{id}", RepairComponent, fast.get_repair_component),
+        ("GET /stock-movements/{id}", StockMovement, fast.get_stock_movement),
+        ("GET /budget-entries/{id}", BudgetEntry, fast.get_budget_entry),
+    ]
+    for name, model, handler in detail_endpoints:
+        row_id = first_id(db, model)
+        if row_id is None:
+            print(f"Skipping {name}: table is empty")
+            continue
+        cases.append((
+            name,
+            lambda model=model, row_id=row_id: db.query(model).filter(model.id == row_id).first(),
+            lambda handler=handler, row_id=row_id: handler(row_id, db)
+        ))
+
+    sku = db.query(Component.sku).limit(1).scalar()
+    if sku is not None:
+        cases.append((
+            "GET /components/sku/{sku}",
+            lambda: db.query(Component).filter(Component.sku == sku).first(),
+            lambda: fast.get_component_by_sku(sku, db)
+        ))
+    return cases
+
+def measure(db, read, iterations):
+    """Latency percentiles (ms) and allocated KiB per call"""
+    for _ in range(min(iterations, 50)):
+        read()
+        db.expunge_all()
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        read()
+        timings.append((time.perf_counter() - start) * 1000)
+        # Keep the ORM identity map from turning later iterations into cache hits
+        db.expunge_all()
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    samples = min(iterations, 100)
+    for _ in range(samples):
+        read()
+        db.expunge_all()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename") if stat.size_diff > 0)
+
+    timings.sort()
+    return {
+        "p50": statistics.median(timings),
+        "p99": timings[int(len(timings) * 0.99) - 1],
+        "kib": allocated / samples / 1024
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ORM vs Core reads per endpoint")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=100, help="Page size for list endpoints")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(f"{'endpoint':32} {'orm p50':>9} {'core p50':>9} {'orm p99':>9} {'core p99':>9} {'orm KiB':>9} {'core KiB':>9} {'speedup':>8}")
+        for name, orm_read, core_read in build_cases(db, args.limit):
+            orm = measure(db, orm_read, args.iterations)
+            core = measure(db, core_read, args.iterations)
+            print(
+                f"{name:32} {orm['p50']:9.3f} {core['p50']:9.3f} {orm['p99']:9.3f} {core['p99']:9.3f} "
+                f"{orm['kib']:9.1f} {core['kib']:9.1f} {orm['p50'] / core['p50']:7.2f}x"
+            )
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+# Pentwheel query plan regression check
+# Seeds the database at scale inside a transaction, drives every API handler
+# that touches the database (plus the job bodies and the stock buffer flusher)
+# against it, runs EXPLAIN (FORMAT JSON) on every statement they issue and fails
+# if any plan filters a large table with a sequential scan. Statements issued by
+# triggers and foreign-key cascades are explained from their SQL. Routes that
+# are not exercised must be listed in UNCHECKED_ENDPOINTS with a reason, or the
+# check fails. Everything is rolled back at the end, so it is safe to point at a
+# development database.
+#
+# A sequential scan only counts as a regression when its filter is selective
+# enough that an index should serve it; scanning for a common status is fine.
+#
+# Usage: python check_query_plans.py [--scale 1.0] [--min-rows 10000] [--max-selectivity 0.01]
+# Exit status is 1 when a plan regresses.
+
+import argparse
+import sys
+import tempfile
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException, Response
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+import fast
+
+SEED_TABLES = [
+    "companies", "components", "returns", "repairs", "shipments",
+    "repair_components", "stock_movements", "budget_entries", "change_log", "row_count_deltas",
+]
+
+# Row counts at --scale 1.0, in dependency order
+SEED_STATEMENTS = [
+    (5000, """
+        INSERT INTO companies (name, email, contact_person)
+        SELECT 'Plan Company ' || g, 'company' || g || '@example.com', 'Contact ' || g
+        FROM generate_series(1, :n) g
+    """),
+    (20000, """
+        INSERT INTO components (name, sku, category, unit_cost, supplier, minimum_stock, current_stock, reorder_level)
+        SELECT 'Plan Component ' || g, 'PLAN-' || lpad(g::TEXT, 8, '0'), 'Category ' || (g % 25),
+               (g % 500) + 0.99, 'Supplier ' || (g % 40), 10, 50 + (g * 7919) % 950,
+               CASE WHEN g % 50 = 0 THEN 2000 ELSE 25 END
+        FROM generate_series(1, :n) g
+    """),
+    (100000, """
+        INSERT INTO returns (return_id, company_id, status, return_date, reason, total_items, total_value)
+        SELECT 'PLAN-RET-' || g, c.ids[1 + (g * 7919) % c.n],
+               (ARRAY['completed', 'pending', 'in-progress', 'cancelled']::status_type[])[1 + g % 4],
+               CURRENT_DATE - (g % 1000), 'Seeded return', g % 20, (g % 5000) + 0.5
+        FROM generate_series(1, :n) g,
+             (SELECT array_agg(id) AS ids, count(*)::INT AS n FROM companies) c
+    """),
+    (100000, """
+        INSERT INTO repairs (repair_id, customer_name, device_model, issue_description, status, priority,
+                             start_date, estimated_completion, assigned_technician, labor_cost, parts_cost)
+        SELECT 'PLAN-REP-' || g, 'Customer ' || (g % 3000), 'Model ' || (g % 60), 'Seeded repair',
+               -- Mostly closed history with a realistic share of open work
+               (ARRAY['completed', 'completed', 'completed', 'completed', 'completed', 'completed',
+                      'cancelled', 'pending', 'in-progress', 'completed']::status_type[])[1 + g % 10],
+               (ARRAY['low', 'medium', 'high', 'critical']::repair_priority[])[1 + (g * 31) % 4],
+               NOW() - ((g % 1000) || ' days')::INTERVAL,
+               NOW() + (((g * 13) % 60 - 30) || ' days')::INTERVAL,
+               'Technician ' || (g % 40), (g % 400) + 0.25, 0
+        FROM generate_series(1, :n) g
+    """),
+    (50000, """
+        INSERT INTO shipments (shipment_id, type, origin, destination, carrier, serial_start, serial_end, total_units, status)
+        SELECT 'PLAN-SHP-' || g, (ARRAY['incoming', 'outgoing']::shipment_type[])[1 + g % 2],
+               'Origin ' || (g % 30), 'Destination ' || (g % 30), 'Carrier ' || (g % 8),
+               'PW-' || lpad((g * 1000)::TEXT, 12, '0'), 'PW-' || lpad((g * 1000 + 999)::TEXT, 12, '0'),
+               1000, (ARRAY['completed', 'pending', 'in-progress', 'cancelled']::status_type[])[1 + g % 4]
+        FROM generate_series(1, :n) g
+    """),
+    (200000, """
+        INSERT INTO repair_components (repair_id, component_id, quantity_needed, quantity_used, cost_per_unit)
+        SELECT r.ids[1 + (g::BIGINT * 7919) % r.n], c.ids[1 + (g::BIGINT * 104729) % c.n], 1 + g % 3, g % 3, (g % 200) + 0.5
+        FROM generate_series(1, :n) g,
+             (SELECT array_agg(id) AS ids, count(*)::INT AS n FROM repairs) r,
+             (SELECT array_agg(id) AS ids, count(*)::INT AS n FROM components) c
+    """),
+    (1000000, """
+        INSERT INTO stock_movements (component_id, movement_type, quantity, reference_type, created_at)
+        SELECT c.ids[1 + (g::BIGINT * 7919) % c.n],
+               (ARRAY['out', 'out', 'out', 'in', 'adjustment'])[1 + g % 5],
+               1 + g % 10, 'seed',
+               NOW() - ((g % (3 * 365 * 24)) || ' hours')::INTERVAL
+        FROM generate_series(1, :n) g,
+             (SELECT array_agg(id) AS ids, count(*)::INT AS n FROM components) c
+    """),
+    (20000, """
+        INSERT INTO budget_entries (week_start, week_end, category, budgeted_amount, actual_amount, description)
+        SELECT DATE '2020-01-06' + (g / 20) * 7, DATE '2020-01-12' + (g / 20) * 7,
+               'Category ' || (g % 20), 1000 + g % 5000, 900 + g % 5200, 'Seeded budget entry'
+        FROM generate_series(0, :n - 1) g
+    """),
+    (500000, """
+        INSERT INTO change_log (txid, table_name, row_id, operation, data)
+        SELECT 1000 + g / 10, 'repairs', uuid_generate_v4(), 'update', '{}'::JSONB
+        FROM generate_series(1, :n) g
+    """),
+    (100000, """
+        INSERT INTO row_count_deltas (table_name, column_name, value, delta)
+        SELECT k.table_name, k.column_name, k.value, CASE WHEN g % 3 = 0 THEN -1 ELSE 1 END
+        FROM generate_series(1, :n) g
+        JOIN (VALUES (0, 'stock_movements', 'movement_type', 'out'), (1, 'stock_movements', 'movement_type', 'in'),
+                     (2, 'repairs', 'status', 'pending'), (3, 'repairs', 'priority', 'high'),
+                     (4, 'returns', 'status', 'completed'), (5, 'shipments', 'type', 'incoming'))
+             AS k(slot, table_name, column_name, value) ON k.slot = g % 6
+    """),
+]
+
+def seed(conn, scale):
+    # Triggers are disabled so the seed does not fan out into stock updates and change log rows
+    for table in SEED_TABLES:
+        conn.execute(text(f"ALTER TABLE {table} DISABLE TRIGGER USER"))
+    for rows, statement in SEED_STATEMENTS:
+        conn.execute(text(statement), {"n": max(1, int(rows * scale))})
+    for table in SEED_TABLES:
+        conn.execute(text(f"ALTER TABLE {table} ENABLE TRIGGER USER"))
+        conn.execute(text(f"ANALYZE {table}"))
+
+def sample(conn):
+    """Ids and values from the seeded data to call the handlers with"""
+    def row(sql):
+        return conn.execute(text(sql)).first()
+
+    # The spare_* rows are only deleted, after every other call has used the first ones
+    return {
+        "company_id": row("SELECT id FROM companies WHERE name LIKE 'Plan Company %' LIMIT 1").id,
+        "spare_company_id": row("SELECT id FROM companies WHERE name LIKE 'Plan Company %' OFFSET 1 LIMIT 1").id,
+        "return_id": row("SELECT id FROM returns LIMIT 1").id,
+        "spare_return_id": row("SELECT id FROM returns OFFSET 1 LIMIT 1").id,
+        "repair_id": row("SELECT id FROM repairs WHERE status = 'pending' LIMIT 1").id,
+        "spare_repair_id": row("SELECT id FROM repairs WHERE status = 'pending' OFFSET 1 LIMIT 1").id,
+        "repair_component_id": row("SELECT id FROM repair_components LIMIT 1").id,
+        "spare_repair_component_id": row("SELECT id FROM repair_components OFFSET 1 LIMIT 1").id,
+        "shipment_id": row("SELECT id FROM shipments LIMIT 1").id,
+        "spare_shipment_id": row("SELECT id FROM shipments OFFSET 1 LIMIT 1").id,
+        "component": row("SELECT id, sku, category FROM components WHERE sku LIKE 'PLAN-%' LIMIT 1"),
+        "spare_component_id": row("SELECT id FROM components WHERE sku LIKE 'PLAN-%' OFFSET 1 LIMIT 1").id,
+        "stock_movement_id": row("SELECT id FROM stock_movements LIMIT 1").id,
+        "budget_entry": row("SELECT id, week_start, category FROM budget_entries LIMIT 1"),
+        "spare_budget_entry_id": row("SELECT id FROM budget_entries OFFSET 1 LIMIT 1").id,
+    }
+
+def buffered_events(component_id):
+    """Queue entries as create_buffered_stock_movement writes them"""
+    now = datetime.now(timezone.utc).isoformat()
+    return [
+        {"id": str(uuid.uuid4()), "component_id": str(component_id), "movement_type": movement_type, "quantity": quantity,
+         "reference_id": None, "reference_type": "plan-check", "notes": None, "created_at": now}
+        for movement_type, quantity in (("in", 5), ("out", 2), ("adjustment", 40))
+    ]
+
+def handler_calls(ids):
+    """(handler, call) pairs covering every query the API issues outside triggers"""
+    component = ids["component"]
+    budget = ids["budget_entry"]
+    serial = "PW-" + str(25 * 1000 + 500).zfill(12)
+    job_id = str(uuid.uuid4())
+    return [
+        (fast.get_companies, lambda db: fast.get_companies(response=Response(), skip=0, limit=100, db=db)),
+        (fast.get_company, lambda db: fast.get_company(ids["company_id"], db)),
+        (fast.get_returns, lambda db: fast.get_returns(response=Response(), skip=0, limit=100, status=fast.StatusType.pending, db=db)),
+        (fast.get_return, lambda db: fast.get_return(ids["return_id"], db)),
+        (fast.get_repairs, lambda db: fast.get_repairs(response=Response(), skip=0, limit=100, status=fast.StatusType.in_progress, priority=fast.RepairPriority.critical, db=db)),
+        (fast.get_repair, lambda db: fast.get_repair(ids["repair_id"], db)),
+        (fast.get_repair_queue, lambda db: fast.get_repair_queue(skip=0, limit=100, technician="Technician 7", unassigned=False, db=db)),
+        (fast.get_repair_queue, lambda db: fast.get_repair_queue(skip=0, limit=100, technician=None, unassigned=False, db=db)),
+        (fast.get_repair_workload, lambda db: fast.get_repair_workload(db)),
+        (fast.get_shipments, lambda db: fast.get_shipments(response=Response(), skip=0, limit=100, type=fast.ShipmentType.incoming, status=fast.StatusType.pending, db=db)),
+        (fast.get_shipment, lambda db: fast.get_shipment(ids["shipment_id"], db)),
+        (fast.get_shipments_by_serial, lambda db: fast.get_shipments_by_serial(serial, type=None, db=db)),
+        (fast.get_shipments_by_serials, lambda db: fast.get_shipments_by_serials(fast.SerialLookupRequest(serials=[serial, "PW-000000042042"]), db)),
+        (fast.get_components, lambda db: fast.get_components(response=Response(), skip=0, limit=100, category=component.category, low_stock=False, db=db)),
+        (fast.get_components, lambda db: fast.get_components(response=Response(), skip=0, limit=100, category=None, low_stock=True, db=db)),
+        (fast.get_component, lambda db: fast.get_component(component.id, db)),
+        (fast.get_component_by_sku, lambda db: fast.get_component_by_sku(component.sku, db)),
+        (fast.get_repair_components, lambda db: fast.get_repair_components(response=Response(), skip=0, limit=100, repair_id=ids["repair_id"], db=db)),
+        (fast.get_repair_component, lambda db: fast.get_repair_component(ids["repair_component_id"], db)),
+        (fast.get_stock_movements, lambda db: fast.get_stock_movements(response=Response(), skip=0, limit=100, component_id=component.id, movement_type=fast.MovementType.out, db=db)),
+        (fast.get_stock_movement, lambda db: fast.get_stock_movement(ids["stock_movement_id"], db)),
+        (fast.get_budget_entries, lambda db: fast.get_budget_entries(response=Response(), skip=0, limit=100, category=budget.category, week_start=None, db=db)),
+        (fast.get_budget_entries, lambda db: fast.get_budget_entries(response=Response(), skip=0, limit=100, category=None, week_start=budget.week_start, db=db)),
+        (fast.get_budget_entry, lambda db: fast.get_budget_entry(budget.id, db)),
+        # Total counts: planner estimate, trigger-maintained counter and EXPLAIN estimate paths
+        (fast.get_stock_movements, lambda db: fast.get_stock_movements(response=Response(), skip=0, limit=100, component_id=None, movement_type=None, include_total=True, db=db)),
+        (fast.get_repairs, lambda db: fast.get_repairs(response=Response(), skip=0, limit=100, status=fast.StatusType.pending, priority=None, include_total=True, db=db)),
+        (fast.get_stock_movements, lambda db: fast.get_stock_movements(response=Response(), skip=0, limit=100, component_id=component.id, movement_type=None, include_total=True, db=db)),
+        (fast.get_components, lambda db: fast.get_components(response=Response(), skip=0, limit=100, category=None, low_stock=True, include_total=True, db=db)),
+        (fast.get_low_stock_components, lambda db: fast.get_low_stock_components(db)),
+        (fast.get_stockout_forecast, lambda db: fast.get_stockout_forecast(horizon_days=30, history_days=90, skip=0, limit=100, db=db)),
+        (fast.get_weekly_budget_summary, lambda db: fast.get_weekly_budget_summary(budget.week_start, db)),
+        (fast.get_repair_status_summary, lambda db: fast.get_repair_status_summary(db)),
+        (fast.get_repair_priority_summary, lambda db: fast.get_repair_priority_summary(db)),
+        (fast.get_shipment_status_summary, lambda db: fast.get_shipment_status_summary(db)),
+        (fast.get_changes, lambda db: fast.get_changes(since="1500-0", limit=1000, table=None, db=db)),
+        # Job bodies, as a worker runs them (reads only; results go to a temporary directory)
+        (fast._budget_report, lambda db: fast._budget_report(job_id, {
+            "week_start_from": budget.week_start, "week_start_to": budget.week_start + timedelta(weeks=26)})),
+        # Writes last; each runs in a savepoint that is rolled back with everything else
+        (fast.create_company, lambda db: fast.create_company(fast.CompanyCreate(name="Plan Check Company"), db)),
+        (fast.update_company, lambda db: fast.update_company(ids["company_id"], fast.CompanyUpdate(phone="+1-555-0199"), db)),
+        (fast.create_return, lambda db: fast.create_return(fast.ReturnCreate(
+            return_id="PLAN-CHECK-RET", company_id=ids["company_id"], return_date=budget.week_start), db)),
+        (fast.update_return, lambda db: fast.update_return(ids["return_id"], fast.ReturnUpdate(status=fast.StatusType.completed), db)),
+        (fast.create_repair, lambda db: fast.create_repair(fast.RepairCreate(repair_id="PLAN-CHECK-REP", issue_description="Plan check"), db)),
+        (fast.update_repair, lambda db: fast.update_repair(ids["repair_id"], fast.RepairUpdate(notes="plan check"), db)),
+        (fast.create_repair_component, lambda db: fast.create_repair_component(
+            fast.RepairComponentCreate(repair_id=ids["repair_id"], component_id=component.id, quantity_needed=2), db)),
+        (fast.complete_repair, lambda db: fast.complete_repair(ids["repair_id"], fast.RepairCompletion(), db)),
+        (fast.create_shipment, lambda db: fast.create_shipment(fast.ShipmentCreate(
+            shipment_id="PLAN-CHECK-SHP", type=fast.ShipmentType.incoming,
+            serial_start="PW-999999000000", serial_end="PW-999999000999", total_units=1000), db)),
+        (fast.update_shipment, lambda db: fast.update_shipment(ids["shipment_id"], fast.ShipmentUpdate(carrier="Plan Carrier"), db)),
+        (fast.create_component, lambda db: fast.create_component(fast.ComponentCreate(name="Plan Check Component", sku="PLAN-CHECK-001"), db)),
+        (fast.update_component, lambda db: fast.update_component(component.id, fast.ComponentUpdate(reorder_level=30), db)),
+        (fast.create_stock_movement, lambda db: fast.create_stock_movement(
+            fast.StockMovementCreate(component_id=component.id, movement_type=fast.MovementType.in_, quantity=5), db)),
+        (fast._flush_stock_movements, lambda db: fast._flush_stock_movements(buffered_events(component.id))),
+        (fast.create_budget_entry, lambda db: fast.create_budget_entry(fast.BudgetEntryCreate(
+            week_start=budget.week_start, week_end=budget.week_start + timedelta(days=6),
+            category="Plan Check", budgeted_amount=100), db)),
+        (fast.update_budget_entry, lambda db: fast.update_budget_entry(budget.id, fast.BudgetEntryUpdate(actual_amount=50), db)),
+        (fast._recalculate_repair_costs, lambda db: fast._recalculate_repair_costs(job_id, {})),
+        (fast.delete_repair_component, lambda db: fast.delete_repair_component(ids["spare_repair_component_id"], db)),
+        (fast.delete_repair, lambda db: fast.delete_repair(ids["spare_repair_id"], db)),
+        (fast.delete_return, lambda db: fast.delete_return(ids["spare_return_id"], db)),
+        (fast.delete_shipment, lambda db: fast.delete_shipment(ids["spare_shipment_id"], db)),
+        (fast.delete_component, lambda db: fast.delete_component(ids["spare_component_id"], db)),
+        (fast.delete_budget_entry, lambda db: fast.delete_budget_entry(ids["spare_budget_entry_id"], db)),
+        (fast.delete_company, lambda db: fast.delete_company(ids["spare_company_id"], db)),
+    ]
+
+# Routes handler_calls does not drive, and why
+UNCHECKED_ENDPOINTS = {
+    "create_buffered_stock_movement": "only appends to Redis; the flush is checked through _flush_stock_movements",
+    "get_stock_movement_buffer_status": "reads Redis only",
+    "create_job": "queues work and records state in Redis; the job bodies are checked directly",
+    "get_job": "reads Redis only",
+    "get_job_result": "reads Redis and the result file only",
+    "health_check": "issues no queries",
+    "admission_metrics": "issues no queries",
+    "update_repair_component": "fails after its commit by returning an undefined name; its lookup is the primary-key read of get_repair_component",
+}
+# The export job body is not run: it streams whole tables without a filter and reports progress through Redis
+
+class ConnectionEngine:
+    """Stands in for an Engine so code that opens its own connection runs inside the check's transaction"""
+    def __init__(self, conn):
+        self.conn = conn
+
+    @contextmanager
+    def connect(self):
+        with self.conn.begin_nested():
+            yield self.conn
+
+    begin = connect
+
+@contextmanager
+def engines_bound_to(conn):
+    """Route the background thread engine and the job worker engine through conn"""
+    saved = fast.background_engine, fast._job_engine, fast.JOB_RESULTS_DIR
+    with tempfile.TemporaryDirectory() as results_dir:
+        fast.background_engine = fast._job_engine = ConnectionEngine(conn)
+        fast.JOB_RESULTS_DIR = results_dir
+        try:
+            yield
+        finally:
+            fast.background_engine, fast._job_engine, fast.JOB_RESULTS_DIR = saved
+
+# Foreign-key cascades run inside RI triggers and never show up as client statements
+CASCADE_STATEMENTS = [
+    ("ON DELETE CASCADE companies -> returns", "DELETE FROM returns WHERE company_id = %(id)s", "company_id"),
+    ("ON DELETE CASCADE repairs -> repair_components", "DELETE FROM repair_components WHERE repair_id = %(id)s", "repair_id"),
+    ("ON DELETE CASCADE components -> repair_components", "DELETE FROM repair_components WHERE component_id = %(id)s", "component"),
+    ("ON DELETE CASCADE components -> stock_movements", "DELETE FROM stock_movements WHERE component_id = %(id)s", "component"),
+]
+
+# Statements run inside triggers, with the trigger's NEW/OLD values as parameters
+TRIGGER_STATEMENTS = [
+    ("trigger_update_component_stock", "UPDATE components SET current_stock = current_stock + 5 WHERE id = %(id)s", "component"),
+    ("record_change", "INSERT INTO change_log (table_name, row_id, operation, data) VALUES ('components', %(id)s, 'update', '{}'::JSONB)", "component"),
+    ("maintain_row_counts", "INSERT INTO row_count_deltas (table_name, column_name, value, delta) VALUES ('repairs', 'status', 'pending', 1)", None),
+    ("compact_row_counts", """
+        WITH moved AS (
+            DELETE FROM row_count_deltas RETURNING table_name, column_name, value, delta
+        ), folded_totals AS (
+            INSERT INTO row_counts (table_name, column_name, value, row_count)
+            SELECT table_name, column_name, value, SUM(delta)
+            FROM moved
+            GROUP BY table_name, column_name, value
+            ORDER BY table_name, column_name, value
+            ON CONFLICT (table_name, column_name, value) DO UPDATE SET row_count = row_counts.row_count + EXCLUDED.row_count
+        )
+        SELECT count(*) FROM moved
+    """, None),
+]
+
+def seq_scans(plan):
+    """Yield (relation, filter, estimated matching rows) for every filtered sequential scan in a plan tree"""
+    if plan.get("Node Type") == "Seq Scan" and "Filter" in plan:
+        yield plan["Relation Name"], plan["Filter"], plan["Plan Rows"]
+    for child in plan.get("Plans", []):
+        yield from seq_scans(child)
+
+def regressions(plan, large, max_selectivity):
+    for relation, condition, matching in seq_scans(plan):
+        if relation in large and matching / large[relation] < max_selectivity:
+            yield relation, condition
+
+def explain(conn, statement, parameters):
+    plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+    return plan[0]["Plan"]
+
+def large_tables(conn, min_rows):
+    """Estimated row counts of the tables that must not be seq-scanned"""
+    rows = conn.execute(text("""
+        SELECT relname, reltuples FROM pg_class
+        WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace AND reltuples >= :min_rows
+    """), {"min_rows": min_rows}).all()
+    return {row.relname: row.reltuples for row in rows}
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if any API query plan sequentially scans a large table")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for the seeded row counts")
+    parser.add_argument("--min-rows", type=int, default=10000, help="Tables at least this large must not be seq-scanned")
+    parser.add_argument("--max-selectivity", type=float, default=0.01,
+                        help="Filters expected to match less than this share of a large table need an index")
+    args = parser.parse_args()
+
+    failures = []
+    checked = 0
+    with fast.engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            print(f"Seeding at scale {args.scale}...")
+            seed(conn, args.scale)
+            large = large_tables(conn, args.min_rows)
+            ids = sample(conn)
+
+            captured = []
+            capturing = [False]
+
+            @event.listens_for(conn, "before_cursor_execute")
+            def capture(conn, cursor, statement, parameters, context, executemany):
+                if capturing[0] and not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")):
+                    captured.append((statement, parameters))
+
+            called = set()
+            with engines_bound_to(conn):
+                for handler, call in handler_calls(ids):
+                    called.add(handler.__name__)
+                    db = Session(bind=conn, join_transaction_mode="create_savepoint")
+                    captured.clear()
+                    capturing[0] = True
+                    try:
+                        call(db)
+                    except HTTPException as exc:
+                        print(f"  note: {handler.__name__} returned {exc.status_code}")
+                    finally:
+                        capturing[0] = False
+                        db.close()
+
+                    for statement, parameters in list(captured):
+                        checked += 1
+                        plan = explain(conn, statement, parameters)
+                        for relation, condition in regressions(plan, large, args.max_selectivity):
+                            failures.append((handler.__name__, relation, condition, statement))
+
+            for name, statement, key in CASCADE_STATEMENTS + TRIGGER_STATEMENTS:
+                checked += 1
+                value = None if key is None else ids[key].id if key == "component" else ids[key]
+                plan = explain(conn, statement, {"id": str(value)})
+                for relation, condition in regressions(plan, large, args.max_selectivity):
+                    failures.append((name, relation, condition, statement))
+
+            routes = {route.endpoint.__name__ for route in fast.app.routes if hasattr(route, "endpoint")}
+            routes -= {"openapi", "swagger_ui_html", "swagger_ui_redirect", "redoc_html"}
+            unchecked = sorted(routes - called - UNCHECKED_ENDPOINTS.keys())
+        finally:
+            transaction.rollback()
+
+    print(f"Checked {checked} statement plans against tables with >= {args.min_rows} rows: {', '.join(sorted(large))}")
+    for name, reason in UNCHECKED_ENDPOINTS.items():
+        print(f"  skipped {name}: {reason}")
+    for name, relation, condition, statement in failures:
+        print(f"\nFAIL {name}: Seq Scan on {relation} (Filter: {condition})\n  {' '.join(statement.split())[:300]}")
+    for name in unchecked:
+        print(f"\nFAIL {name}: route is not exercised; add it to handler_calls or UNCHECKED_ENDPOINTS")
+    if failures or unchecked:
+        sys.exit(1)
+    print("All plans use indexes on large tables")
+
+if __name__ == "__main__":
+    main()